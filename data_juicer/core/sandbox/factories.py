@@ -1,3 +1,9 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+from jsonargparse import Namespace, namespace_to_dict
+
 from data_juicer.core import Analyzer
 from data_juicer.core import Executor as DjExecutor
 from data_juicer.core.sandbox.evaluators import (Gpt3QualityEvaluator,
@@ -82,12 +88,44 @@ model_evaluator_factory = ModelEvaluatorFactory()
 
 class ModelInferEvaluatorFactory(object):
 
+    def __init__(self, cache_size: int = 1):
+        """
+        Initialization method.
+
+        :param cache_size: max number of recently used executors kept in
+            memory. Their models are loaded when initializing, so that the
+            same model config won't load the model again. Each of them holds
+            a whole model, so only a few are kept. Set it to 0 to disable the
+            cache.
+        """
+        self.cache_size = cache_size
+        self._executor_cache = OrderedDict()
+
+    @staticmethod
+    def _get_cfg_key(model_cfg):
+        if isinstance(model_cfg, Namespace):
+            model_cfg = namespace_to_dict(model_cfg)
+        cfg_str = json.dumps(model_cfg, sort_keys=True, default=str)
+        return hashlib.blake2b(cfg_str.encode('utf-8')).hexdigest()
+
     def __call__(self, model_cfg: dict = None, *args, **kwargs):
         if model_cfg is None:
             return None
 
         if model_cfg.type == 'modelscope':
-            return ModelscopeInferProbeExecutor(model_cfg)
+            cfg_key = self._get_cfg_key(model_cfg)
+            executor = self._executor_cache.pop(cfg_key, None)
+            if executor is None:
+                # release the least recently used models before loading the
+                # new one, so that they are not in memory at the same time
+                while self._executor_cache and \
+                        len(self._executor_cache) >= self.cache_size:
+                    self._executor_cache.popitem(last=False)
+                executor = ModelscopeInferProbeExecutor(model_cfg)
+            if self.cache_size > 0:
+                # (re-)insert it as the most recently used one
+                self._executor_cache[cfg_key] = executor
+            return executor
 
         # add more model inference here freely
 
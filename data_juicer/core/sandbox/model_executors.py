@@ -1,10 +1,10 @@
 import asyncio
+import contextlib
 import os
 import re
 import stat
-import subprocess
-import sys
 import time
+from types import MappingProxyType
 
 from jsonargparse import namespace_to_dict
 
@@ -20,6 +20,8 @@ class BaseModelExecutor(object):
         self.model_config = model_config
         self.executor = None
         self.watcher = watcher
+        # the log file of the current execution, which is watched by watcher
+        self.log_f = None
         # log to tell the end of model execution
         self.END_OF_MODEL_EXEC = \
             "<DJ-Sandbox> End of ModelExecutor's running <DJ-Sandbox>"
@@ -29,40 +31,78 @@ class BaseModelExecutor(object):
         conduct some model-related execution tasks
             given specified run_type and run_obj
         """
-        watch_task = asyncio.create_task(
-            self.watch_run(run_type, run_obj, **kwargs))
+        # run new tasks eagerly until their first suspension to skip the
+        # scheduling round trips of the event loop (python >= 3.12). The task
+        # factory of the caller's loop is kept if there is one, and is
+        # restored after the execution
+        loop = asyncio.get_running_loop()
+        orig_task_factory = loop.get_task_factory()
+        if hasattr(asyncio, 'eager_task_factory') and \
+                orig_task_factory is None:
+            loop.set_task_factory(asyncio.eager_task_factory)
+        try:
+            return await self._run_and_watch(run_type, run_obj, **kwargs)
+        finally:
+            loop.set_task_factory(orig_task_factory)
+
+    async def _run_and_watch(self, run_type, run_obj=None, **kwargs):
         if self.watcher is None:
-            run_task = asyncio.create_task(
-                self._run(run_type, run_obj, **kwargs))
-            await run_task
+            await self._run(run_type, run_obj, **kwargs)
             return None
-        else:
-            original_stdout = sys.stdout
-            original_stderr = sys.stderr
+        timestamp = time.strftime('%Y%m%d%H%M%S', time.localtime(time.time()))
+        log_f_name = os.path.join(self.watcher.sandbox_cfg.work_dir,
+                                  f'model_exe_{run_type}_{timestamp}.log')
+        self.watcher.model_exe_log_file = log_f_name
+        with open(log_f_name, 'w') as log_f:
+            # the log file is passed to the outputs of the execution
+            # explicitly, instead of replacing the global sys.stdout and
+            # sys.stderr
+            self.log_f = log_f
             try:
-                timestamp = time.strftime('%Y%m%d%H%M%S',
-                                          time.localtime(time.time()))
-                log_f_name = os.path.join(
-                    self.watcher.sandbox_cfg.work_dir,
-                    f'model_exe_{run_type}_{timestamp}.log')
-                self.watcher.model_exe_log_file = log_f_name
-                with open(log_f_name, 'w') as log_f:
-                    sys.stdout = log_f
-                    sys.stderr = log_f
-                    run_task = asyncio.create_task(
-                        self._run(run_type, run_obj, **kwargs))
-                    await run_task
-                    print(self.END_OF_MODEL_EXEC, flush=True)
-                    summarized_watched_res = await watch_task
+                # start watching after the log file is created, since an
+                # eager task starts to run immediately
+                watch_task = asyncio.create_task(
+                    self.watch_run(run_type, run_obj, **kwargs))
+                await self._run(run_type, run_obj, **kwargs)
+                print(self.END_OF_MODEL_EXEC, file=log_f, flush=True)
+                summarized_watched_res = await watch_task
             finally:
-                sys.stdout = original_stdout
-                sys.stderr = original_stderr
-            return summarized_watched_res
+                self.log_f = None
+        return summarized_watched_res
 
-    def run_subprocess(self, script_path, run_args, working_dir, cmd='bash'):
+    @contextlib.contextmanager
+    def redirect_output(self):
+        """
+        redirect the outputs of in-process executions to the log file when
+            there is one
+        """
+        if self.log_f is None:
+            yield
+        else:
+            with contextlib.redirect_stdout(self.log_f), \
+                    contextlib.redirect_stderr(self.log_f):
+                yield
+
+    async def run_subprocess(self,
+                             script_path,
+                             run_args,
+                             working_dir,
+                             cmd='bash'):
         run_args = [str(arg) for arg in run_args]
-        args = [cmd, script_path] + run_args
-        subprocess.run(args, cwd=working_dir)
+        if self.log_f is None:
+            stdout, stderr = None, None
+        else:
+            # write to the log file directly without blocking the event loop,
+            # so that the watcher can consume the outputs meanwhile
+            self.log_f.flush()
+            stdout, stderr = self.log_f, asyncio.subprocess.STDOUT
+        proc = await asyncio.create_subprocess_exec(cmd,
+                                                    script_path,
+                                                    *run_args,
+                                                    cwd=working_dir,
+                                                    stdout=stdout,
+                                                    stderr=stderr)
+        await proc.wait()
 
     async def _run(self, run_type, run_obj=None, **kwargs):
         raise NotImplementedError
@@ -154,11 +194,13 @@ class ModelscopeTrainExecutor(ModelScopeExecutor):
 
     def __init__(self, model_config, watcher=None):
         super().__init__(model_config, watcher)
-        self.model_config = namespace_to_dict(model_config)
+        # convert the namespace only once, and keep it read-only since it's
+        # shared by all the executions of this executor
+        self.model_config = MappingProxyType(namespace_to_dict(model_config))
         self.executor = None
 
     def cfg_modify_fn(self, cfg):
-        cfg.merge_from_dict(self.model_config)
+        cfg.merge_from_dict(dict(self.model_config))
         return cfg
 
     def build_executor(self,
@@ -206,8 +248,9 @@ class ModelscopeTrainExecutor(ModelScopeExecutor):
         if 'work_dir' in self.model_config:
             builder_kwargs['work_dir'] = self.model_config['work_dir']
         self.work_dir = builder_kwargs['work_dir']
-        self.build_executor(**builder_kwargs)
-        self.executor.train()
+        with self.redirect_output():
+            self.build_executor(**builder_kwargs)
+            self.executor.train()
 
 
 class EasyAnimateTrainExecutor(BaseModelExecutor):
@@ -242,7 +285,7 @@ class EasyAnimateTrainExecutor(BaseModelExecutor):
             config.tracker_config.project_name,
             config.tracker_config.experiment_name
         ]
-        self.run_subprocess(self.script_path, run_args, self.working_dir)
+        await self.run_subprocess(self.script_path, run_args, self.working_dir)
 
 
 class EasyAnimateInferExecutor(BaseModelExecutor):
@@ -267,7 +310,7 @@ class EasyAnimateInferExecutor(BaseModelExecutor):
             config.infer_config.video_num_per_prompt, config.infer_config.seed,
             config.saving_config.output_video_dir
         ]
-        self.run_subprocess(self.script_path, run_args, self.working_dir)
+        await self.run_subprocess(self.script_path, run_args, self.working_dir)
 
 
 class LLaVAExecutor(BaseModelExecutor):
@@ -1,11 +1,17 @@
+import os
+import re
+from collections import OrderedDict
+
 import numpy as np
+import xxhash
 from PIL import ImageOps
 
 from data_juicer.utils.availability_utils import AvailabilityChecking
 from data_juicer.utils.constant import Fields, StatsKeys
-from data_juicer.utils.mm_utils import (SpecialTokens, load_data_with_context,
-                                        load_image, remove_special_tokens)
+from data_juicer.utils.mm_utils import (SpecialTokens, get_special_tokens,
+                                        load_data_with_context, load_image)
 from data_juicer.utils.model_utils import get_model, prepare_model
+from data_juicer.utils.process_utils import get_thread_pool
 
 from ..base_op import OPERATORS, Filter
 from ..op_fusion import LOADED_IMAGES
@@ -20,6 +26,18 @@ with AvailabilityChecking(['torch', 'transformers'], OP_NAME):
     torch.set_num_threads(1)
 
 
+def iter_chunks(text, sep):
+    """Yield the same chunks as `text.split(sep)` without building the list
+    of them first."""
+    start = 0
+    while start <= len(text):
+        end = text.find(sep, start)
+        if end == -1:
+            end = len(text)
+        yield text[start:end]
+        start = end + len(sep)
+
+
 @OPERATORS.register_module(OP_NAME)
 @LOADED_IMAGES.register_module(OP_NAME)
 class ImageTextMatchingFilter(Filter):
@@ -37,6 +55,7 @@ class ImageTextMatchingFilter(Filter):
                  vertical_flip: bool = False,
                  any_or_all: str = 'any',
                  reduce_mode: str = 'avg',
+                 cache_size: int = 1024,
                  *args,
                  **kwargs):
         """
@@ -57,6 +76,9 @@ class ImageTextMatchingFilter(Filter):
             'avg': Take the average of multiple values
             'max': Take the max of multiple values
             'min': Take the min of multiple values
+        :param cache_size: max number of image-text matching results kept
+            in memory, so that samples with the same images and text are
+            scored only once. Set it to 0 to disable the cache.
         :param args: extra args
         :param kwargs: extra args
         """
@@ -76,6 +98,17 @@ class ImageTextMatchingFilter(Filter):
         self.reduce_mode = reduce_mode
         self.horizontal_flip = horizontal_flip
         self.vertical_flip = vertical_flip
+        self.cache_size = cache_size
+        self.score_cache = OrderedDict()
+
+        # special tokens might be updated by the config before initializing
+        # ops, so they are cached here instead of at the module level
+        self.eoc_token = SpecialTokens.eoc
+        self.image_token = SpecialTokens.image
+        # the other special tokens are removed from the whole text at once
+        self.other_special_tokens_pattern = re.compile('|'.join(
+            re.escape(token) for token in get_special_tokens().values()
+            if token not in [self.eoc_token, self.image_token]))
 
     def compute_stats(self, sample, rank=None, context=False):
         # check if it's computed already
@@ -89,71 +122,121 @@ class ImageTextMatchingFilter(Filter):
                     [], dtype=np.float64)
             return sample
 
-        # load images
         loaded_image_keys = sample[self.image_key]
-        sample, images = load_data_with_context(sample, context,
-                                                loaded_image_keys, load_image)
-
         text = sample[self.text_key]
-        offset = 0
-        matching_scores = []
-        model, processor = get_model(self.model_key, rank, self.use_cuda())
 
-        for chunk in text.split(SpecialTokens.eoc):
-            count = chunk.count(SpecialTokens.image)
+        # reuse the scores of the same images and text
+        cache_key = None
+        if self.cache_size > 0:
+            cache_key = self._get_cache_key(loaded_image_keys, text)
+            if cache_key in self.score_cache:
+                self.score_cache.move_to_end(cache_key)
+                sample[Fields.stats][
+                    StatsKeys.image_text_matching_score] = list(
+                        self.score_cache[cache_key])
+                return sample
+
+        # load images by a thread pool shared in the same process, since
+        # loading is I/O bound
+        sample, images = load_data_with_context(sample,
+                                                context,
+                                                loaded_image_keys,
+                                                load_image,
+                                                executor=get_thread_pool(
+                                                    'image_loading',
+                                                    max_workers=8))
+
+        offset = 0
+        text_chunks = []
+        image_chunks = []
+        chunk_counts = []
+        text_without_other_tokens = self.other_special_tokens_pattern.sub(
+            '', text)
+        for chunk in iter_chunks(text_without_other_tokens, self.eoc_token):
+            count = chunk.count(self.image_token)
 
             # no image or no text
             if count == 0 or len(chunk) == 0:
                 continue
             else:
-                text_chunk = remove_special_tokens(chunk)
-                image_chunk = []
-                for image_key in loaded_image_keys[offset:offset + count]:
+                text_chunk = chunk.replace(self.image_token, '').strip()
+                # there might be fewer images left than image tokens
+                chunk_image_keys = loaded_image_keys[offset:offset + count]
+                for image_key in chunk_image_keys:
                     image = images[image_key]
                     if self.horizontal_flip:
                         image = ImageOps.mirror(image)
                     if self.vertical_flip:
                         image = ImageOps.flip(image)
-                    image_chunk.append(image)
-
-                inputs = processor(text=text_chunk,
-                                   images=image_chunk,
-                                   return_tensors='pt',
-                                   truncation=True,
-                                   max_length=model.config.text_config.
-                                   max_position_embeddings,
-                                   padding=True).to(model.device)
+                    # pair the text of this chunk with each of its images
+                    text_chunks.append(text_chunk)
+                    image_chunks.append(image)
+                if len(chunk_image_keys) > 0:
+                    chunk_counts.append(len(chunk_image_keys))
+            offset += count
 
+        matching_scores = []
+        if len(chunk_counts) > 0:
+            model, processor = get_model(self.model_key, rank, self.use_cuda())
+            # score all the image-text pairs of this sample in one batch
+            inputs = processor(
+                text=text_chunks,
+                images=image_chunks,
+                return_tensors='pt',
+                truncation=True,
+                max_length=model.config.text_config.max_position_embeddings,
+                padding=True).to(model.device)
+
+            # run the forward in half precision when the device supports it
+            device_type = model.device.type
+            if device_type == 'cuda':
+                amp_dtype, use_amp = torch.float16, True
+            else:
+                amp_dtype = torch.bfloat16
+                use_amp = getattr(torch.cpu, '_is_avx512_bf16_supported',
+                                  lambda: False)()
+            with torch.inference_mode(), torch.autocast(
+                    device_type=device_type, dtype=amp_dtype, enabled=use_amp):
                 outputs = model(**inputs)
-                itm_scores = outputs.itm_score.detach().cpu().softmax(
-                    dim=-1)[:, 1]
+            itm_scores = outputs.itm_score.float().cpu().softmax(dim=-1)[:, 1]
 
+            for chunk_itm_scores in torch.split(itm_scores, chunk_counts):
                 if self.reduce_mode == 'avg':
-                    chunk_itm_score = itm_scores.mean()
+                    chunk_itm_score = chunk_itm_scores.mean()
                 elif self.reduce_mode == 'max':
-                    chunk_itm_score = itm_scores.max()
+                    chunk_itm_score = chunk_itm_scores.max()
                 else:
-                    chunk_itm_score = itm_scores.min()
+                    chunk_itm_score = chunk_itm_scores.min()
 
                 matching_scores.append(float(chunk_itm_score))
-            offset += count
+
+        if cache_key is not None:
+            self.score_cache[cache_key] = list(matching_scores)
+            if len(self.score_cache) > self.cache_size:
+                self.score_cache.popitem(last=False)
         sample[Fields.stats][
             StatsKeys.image_text_matching_score] = matching_scores
 
         return sample
 
+    def _get_cache_key(self, image_keys, text):
+        # the modified time of images is hashed as well, so that the cached
+        # scores are invalidated when the image files change
+        m = xxhash.xxh64()
+        for image_key in image_keys:
+            m.update(image_key.encode('utf-8') + b'\0')
+            if os.path.exists(image_key):
+                m.update(
+                    str(os.path.getmtime(image_key)).encode('utf-8') + b'\0')
+        m.update(text.encode('utf-8'))
+        return m.hexdigest()
+
     def process(self, sample, rank=None):
         itm_scores = sample[Fields.stats][StatsKeys.image_text_matching_score]
         if len(itm_scores) <= 0:
             return True
 
-        keep_bools = np.array([
-            self.min_score <= itm_score <= self.max_score
-            for itm_score in itm_scores
-        ])
-
         # different strategies
-        if self.any:
-            return keep_bools.any()
-        else:
-            return keep_bools.all()
+        strategy = any if self.any else all
+        return strategy(self.min_score <= itm_score <= self.max_score
+                        for itm_score in itm_scores)
@@ -2,6 +2,8 @@
 # https://github.com/togethercomputer/RedPajama-Data/tree/rp_v1/
 # --------------------------------------------------------
 
+import re
+
 from data_juicer.utils.availability_utils import AvailabilityChecking
 
 from ..base_op import OPERATORS, Mapper
@@ -9,7 +11,16 @@ from ..base_op import OPERATORS, Mapper
 OP_NAME = 'clean_html_mapper'
 
 with AvailabilityChecking(['selectolax'], OP_NAME):
-    from selectolax.parser import HTMLParser
+    from selectolax.lexbor import LexborHTMLParser
+
+# list tags are replaced in a single pass before parsing
+LIST_TAG_PATTERN = re.compile(r'</?(?:li|ol)>')
+LIST_TAG_REPLACEMENTS = {
+    '<li>': '\n*',
+    '</li>': '',
+    '<ol>': '\n*',
+    '</ol>': '',
+}
 
 
 @OPERATORS.register_module(OP_NAME)
@@ -28,11 +39,9 @@ class CleanHtmlMapper(Mapper):
     def process(self, sample):
 
         def _clean_html(raw_html):
-            raw_html = raw_html.replace('<li>', '\n*')
-            raw_html = raw_html.replace('</li>', '')
-            raw_html = raw_html.replace('<ol>', '\n*')
-            raw_html = raw_html.replace('</ol>', '')
-            parser = HTMLParser(raw_html)
+            raw_html = LIST_TAG_PATTERN.sub(
+                lambda match: LIST_TAG_REPLACEMENTS[match.group(0)], raw_html)
+            parser = LexborHTMLParser(raw_html)
             return parser.text()
 
         sample[self.text_key] = _clean_html(sample[self.text_key])
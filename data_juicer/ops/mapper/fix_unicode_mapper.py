@@ -1,3 +1,5 @@
+import re
+
 from data_juicer.utils.availability_utils import AvailabilityChecking
 
 from ..base_op import OPERATORS, Mapper
@@ -7,11 +9,17 @@ OP_NAME = 'fix_unicode_mapper'
 with AvailabilityChecking(['ftfy'], OP_NAME):
     import ftfy
 
+# ascii characters that ftfy might still change, e.g. html entities, "\r"
+# line breaks, terminal escapes and control characters
+ASCII_TO_FIX_PATTERN = re.compile(r'[&\x00-\x08\x0b\x0d-\x1f\x7f]')
+
 
 @OPERATORS.register_module(OP_NAME)
 class FixUnicodeMapper(Mapper):
     """Mapper to fix unicode errors in text samples."""
 
+    _batched_op = True
+
     def __init__(self, normalization: str = None, *args, **kwargs):
         """
         Initialization method.
@@ -33,7 +41,14 @@ class FixUnicodeMapper(Mapper):
                              'supported. Can only be one of '
                              '["NFC", "NFKC", "NFD", "NFKD"]')
 
-    def process(self, sample):
-        sample[self.text_key] = ftfy.fix_text(sample[self.text_key],
-                                              normalization=self.normalization)
-        return sample
+    def process(self, samples):
+        samples[self.text_key] = [
+            self._fix_text(text) for text in samples[self.text_key]
+        ]
+        return samples
+
+    def _fix_text(self, text):
+        # skip pure ascii texts that ftfy would leave unchanged
+        if text.isascii() and not ASCII_TO_FIX_PATTERN.search(text):
+            return text
+        return ftfy.fix_text(text, normalization=self.normalization)
@@ -4,6 +4,46 @@
 
 from ..base_op import OPERATORS, Mapper
 
+PUNCTUATION_UNICODE = {
+    '，': ',',
+    '。': '.',
+    '、': ',',
+    '„': '"',
+    '”': '"',
+    '“': '"',
+    '«': '"',
+    '»': '"',
+    '１': '"',
+    '」': '"',
+    '「': '"',
+    '《': '"',
+    '》': '"',
+    '´': "'",
+    '∶': ':',
+    '：': ':',
+    '？': '?',
+    '！': '!',
+    '（': '(',
+    '）': ')',
+    '；': ';',
+    '–': '-',
+    '—': ' - ',
+    '．': '. ',
+    '～': '~',
+    '’': "'",
+    '…': '...',
+    '━': '-',
+    '〈': '<',
+    '〉': '>',
+    '【': '[',
+    '】': ']',
+    '％': '%',
+    '►': '-',
+}
+
+# translation table shared by all the mapper instances
+PUNCTUATION_TRANS = str.maketrans(PUNCTUATION_UNICODE)
+
 
 @OPERATORS.register_module('punctuation_normalization_mapper')
 class PunctuationNormalizationMapper(Mapper):
@@ -18,45 +58,9 @@ class PunctuationNormalizationMapper(Mapper):
         :param kwargs: extra args
         """
         super().__init__(*args, **kwargs)
-        self.punctuation_unicode = {
-            '，': ',',
-            '。': '.',
-            '、': ',',
-            '„': '"',
-            '”': '"',
-            '“': '"',
-            '«': '"',
-            '»': '"',
-            '１': '"',
-            '」': '"',
-            '「': '"',
-            '《': '"',
-            '》': '"',
-            '´': "'",
-            '∶': ':',
-            '：': ':',
-            '？': '?',
-            '！': '!',
-            '（': '(',
-            '）': ')',
-            '；': ';',
-            '–': '-',
-            '—': ' - ',
-            '．': '. ',
-            '～': '~',
-            '’': "'",
-            '…': '...',
-            '━': '-',
-            '〈': '<',
-            '〉': '>',
-            '【': '[',
-            '】': ']',
-            '％': '%',
-            '►': '-',
-        }
+        self.punctuation_unicode = PUNCTUATION_UNICODE
+        self.trans = PUNCTUATION_TRANS
 
     def process(self, sample):
-        sample[self.text_key] = ''.join([
-            self.punctuation_unicode.get(c, c) for c in sample[self.text_key]
-        ])
+        sample[self.text_key] = sample[self.text_key].translate(self.trans)
         return sample
@@ -1,7 +1,8 @@
-import copy
+import math
+import os
 import re
-
-import numpy as np
+from collections import OrderedDict
+from operator import itemgetter
 
 from data_juicer.utils.constant import Fields
 from data_juicer.utils.file_utils import (add_suffix_to_filename,
@@ -9,21 +10,32 @@ from data_juicer.utils.file_utils import (add_suffix_to_filename,
 from data_juicer.utils.mm_utils import (SpecialTokens, close_video,
                                         cut_video_by_seconds,
                                         get_video_duration, load_video)
+from data_juicer.utils.process_utils import get_thread_pool
 
 from ..base_op import OPERATORS, Mapper
 from ..op_fusion import LOADED_VIDEOS
 
 
 def create_replacer(replacements):
+    # placeholders are consumed in order without shifting the list
+    replacements = iter(replacements)
 
     def replacer(match):
-        return replacements.pop(0)
+        return next(replacements)
 
     return replacer
 
 
 OP_NAME = 'video_split_by_duration_mapper'
 
+# the video special token is not configurable, so it and its pattern are
+# prepared only once
+VIDEO_TOKEN = SpecialTokens.video
+VIDEO_PATTERN = re.compile(re.escape(VIDEO_TOKEN))
+
+# max number of opened videos kept for reuse within a batch
+VIDEO_CACHE_SIZE = 16
+
 
 @OPERATORS.register_module(OP_NAME)
 @LOADED_VIDEOS.register_module(OP_NAME)
@@ -60,32 +72,63 @@ class VideoSplitByDurationMapper(Mapper):
         self.min_last_split_duration = min_last_split_duration
         self.keep_original_sample = keep_original_sample
         self.extra_args = kwargs
+        # the eoc special token might be updated by the config before
+        # initializing ops, so it's cached here instead of at the module level
+        self.eoc_token = SpecialTokens.eoc
+        # video segments are cut by a thread pool shared in the same process,
+        # since decoding and encoding in FFmpeg release the GIL. The CPUs are
+        # shared among the processes running this op
+        self.max_cut_workers = max(1,
+                                   (os.cpu_count() or 1) // self.runtime_np())
 
     def split_videos_by_duration(self, video_key, container):
         video_duration = get_video_duration(container)
-        timestamps = np.arange(0, video_duration, self.split_duration).tolist()
-        count = 0
-        split_video_keys = []
-        unique_video_key = transfer_filename(video_key, OP_NAME,
-                                             **self._init_parameters)
-        for i in range(1, len(timestamps)):
-            split_video_key = add_suffix_to_filename(unique_video_key,
-                                                     f'_{count}')
-            if cut_video_by_seconds(container, split_video_key,
-                                    timestamps[i - 1], timestamps[i]):
-                split_video_keys.append(split_video_key)
-                count += 1
-
+        # start timestamps of the splits, which are the same as those from
+        # np.arange(0, video_duration, self.split_duration)
+        timestamps = [
+            i * self.split_duration
+            for i in range(math.ceil(video_duration / self.split_duration))
+        ]
+        if len(timestamps) == 0:
+            return []
+        segments = list(zip(timestamps[:-1], timestamps[1:]))
         if video_duration - timestamps[-1] >= self.min_last_split_duration:
-            split_video_key = add_suffix_to_filename(unique_video_key,
-                                                     f'_{count}')
+            segments.append((timestamps[-1], None))
+        if len(segments) == 0:
+            return []
 
-            if cut_video_by_seconds(container, split_video_key,
-                                    timestamps[-1]):
-                split_video_keys.append(split_video_key)
+        unique_video_key = transfer_filename(video_key, OP_NAME,
+                                             **self._init_parameters)
+        segment_keys = [
+            add_suffix_to_filename(unique_video_key, f'_{i}')
+            for i in range(len(segments))
+        ]
+        # the container can't be shared by threads, so the other segments
+        # are cut from the video reopened by its path in the pool, while the
+        # first one is cut from the container in this thread
+        futures = [
+            get_thread_pool(OP_NAME, self.max_cut_workers).submit(
+                cut_video_by_seconds, video_key, segment_key, *segment)
+            for segment_key, segment in zip(segment_keys[1:], segments[1:])
+        ]
+        results = [
+            cut_video_by_seconds(container, segment_keys[0], *segments[0])
+        ]
+        results.extend(future.result() for future in futures)
+
+        # number the successfully cut splits continuously
+        split_video_keys = []
+        for segment_key, success in zip(segment_keys, results):
+            if not success:
+                continue
+            split_video_key = add_suffix_to_filename(
+                unique_video_key, f'_{len(split_video_keys)}')
+            if split_video_key != segment_key:
+                os.replace(segment_key, split_video_key)
+            split_video_keys.append(split_video_key)
         return split_video_keys
 
-    def _process_single_sample(self, sample):
+    def _process_single_sample(self, sample, video_cache):
         # there is no video in this sample
         if self.video_key not in sample or sample[
                 self.video_key] is None or len(sample[self.video_key]) == 0:
@@ -96,71 +139,84 @@ class VideoSplitByDurationMapper(Mapper):
             sample[Fields.source_file] = sample[self.video_key]
 
         # the split results
-        split_sample = copy.deepcopy(sample)
+        split_sample = sample.copy()
         split_sample[self.text_key] = ''
         split_sample[Fields.source_file] = []
 
-        # load all video(s)
+        # load all video(s), reusing the ones loaded by former samples in
+        # this batch
         loaded_video_keys = sample[self.video_key]
-        videos = {}
         for loaded_video_key in loaded_video_keys:
-            if loaded_video_key not in videos:
-                # avoid loading the same videos
-                video = load_video(loaded_video_key)
-                videos[loaded_video_key] = video
+            if loaded_video_key in video_cache:
+                video_cache.move_to_end(loaded_video_key)
+            else:
+                video_cache[loaded_video_key] = load_video(loaded_video_key)
 
         split_video_keys = []
         offset = 0
         # split each video chunk by chunk
-        for chunk in sample[self.text_key].split(SpecialTokens.eoc):
+        for chunk in sample[self.text_key].split(self.eoc_token):
             # skip empty chunks or contents after the last eoc token
             if not chunk.strip():
                 continue
             else:
-                video_count = chunk.count(SpecialTokens.video)
+                video_count = chunk.count(VIDEO_TOKEN)
                 place_holders = []
                 for video_key in loaded_video_keys[offset:offset +
                                                    video_count]:
-                    video = videos[video_key]
                     new_video_keys = self.split_videos_by_duration(
-                        video_key, video)
-                    close_video(video)
+                        video_key, video_cache[video_key])
                     split_video_keys.extend(new_video_keys)
-                    place_holders.append(SpecialTokens.video *
-                                         len(new_video_keys))
+                    place_holders.append(VIDEO_TOKEN * len(new_video_keys))
                     split_sample[Fields.source_file].extend(
                         [video_key] * len(new_video_keys))
 
                 # insert the generated text according to given mode
-                replacer_function = create_replacer(place_holders)
-                new_split_text_per_chunk = re.sub(SpecialTokens.video,
-                                                  replacer_function, chunk)
-                split_sample[
-                    self.
-                    text_key] += f'{new_split_text_per_chunk}{SpecialTokens.eoc}'  # noqa: E501
+                if video_count == 0:
+                    new_split_text_per_chunk = chunk
+                else:
+                    replacer_function = create_replacer(place_holders)
+                    new_split_text_per_chunk = VIDEO_PATTERN.sub(
+                        replacer_function, chunk)
+                split_sample[self.text_key] += \
+                    f'{new_split_text_per_chunk}{self.eoc_token}'
                 offset += video_count
 
         split_sample[self.video_key] = split_video_keys
+
+        # close the least recently used videos, which are not used by this
+        # sample as its videos are the most recently used ones
+        while len(video_cache) > max(VIDEO_CACHE_SIZE,
+                                     len(set(loaded_video_keys))):
+            close_video(video_cache.popitem(last=False)[1])
         return [split_sample]
 
     def process(self, samples):
-        # reconstruct samples from "dict of lists" to "list of dicts"
-        reconstructed_samples = []
-        for i in range(len(samples[self.text_key])):
-            reconstructed_samples.append(
-                {key: samples[key][i]
-                 for key in samples})
+        keys = list(samples.keys())
         samples_after_split = []
-        # do split for each sample within the batch
-        for ori_sample in reconstructed_samples:
-            if self.keep_original_sample:
-                samples_after_split.append(ori_sample)
-            generated_samples = self._process_single_sample(ori_sample)
-            if len(generated_samples) != 0:
-                samples_after_split.extend(generated_samples)
-        # reconstruct samples from "list of dicts" to "dict of lists"
-        keys = samples_after_split[0].keys()
-        res_samples = {}
-        for key in keys:
-            res_samples[key] = [s[key] for s in samples_after_split]
-        return res_samples
+        video_cache = OrderedDict()
+        try:
+            # iterate over the rows of columns directly
+            for values in zip(*(samples[key] for key in keys)):
+                ori_sample = dict(zip(keys, values))
+                if self.keep_original_sample:
+                    samples_after_split.append(ori_sample)
+                samples_after_split.extend(
+                    self._process_single_sample(ori_sample, video_cache))
+        finally:
+            for video in video_cache.values():
+                close_video(video)
+
+        # the source file field is always filled for the output samples
+        res_keys = keys if Fields.source_file in keys else keys + [
+            Fields.source_file
+        ]
+        if len(samples_after_split) == 0:
+            return {key: [] for key in res_keys}
+        # reconstruct samples from "list of dicts" to "dict of lists" in a
+        # single pass
+        res_columns = zip(*map(itemgetter(*res_keys), samples_after_split))
+        return {
+            key: list(res_values)
+            for key, res_values in zip(res_keys, res_columns)
+        }
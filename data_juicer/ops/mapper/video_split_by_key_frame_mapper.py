@@ -13,9 +13,11 @@ from ..op_fusion import LOADED_VIDEOS
 
 
 def create_replacer(replacements):
+    # placeholders are consumed in order without shifting the list
+    replacements = iter(replacements)
 
     def replacer(match):
-        return replacements.pop(0)
+        return next(replacements)
 
     return replacer
 
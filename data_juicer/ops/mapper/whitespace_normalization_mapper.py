@@ -5,6 +5,13 @@
 from ..base_op import OPERATORS, Mapper
 from ..common.special_characters import VARIOUS_WHITESPACES
 
+# translation table that maps all kinds of whitespaces to ' '
+WHITESPACE_TRANS = str.maketrans({char: ' ' for char in VARIOUS_WHITESPACES})
+# the only whitespaces to be replaced in ASCII texts, for which replacing
+# them one by one is faster than translating
+ASCII_WHITESPACES = sorted(char for char in VARIOUS_WHITESPACES
+                           if char.isascii() and char != ' ')
+
 
 @OPERATORS.register_module('whitespace_normalization_mapper')
 class WhitespaceNormalizationMapper(Mapper):
@@ -30,8 +37,11 @@ class WhitespaceNormalizationMapper(Mapper):
         text = sample[self.text_key].strip()
 
         # replace all kinds of whitespaces with ' '
-        sample[self.text_key] = ''.join([
-            char if char not in VARIOUS_WHITESPACES else ' ' for char in text
-        ])
+        if text.isascii():
+            for char in ASCII_WHITESPACES:
+                text = text.replace(char, ' ')
+            sample[self.text_key] = text
+        else:
+            sample[self.text_key] = text.translate(WHITESPACE_TRANS)
 
         return sample
@@ -1,6 +1,6 @@
-import heapq
 from typing import Optional
 
+import numpy as np
 from pydantic import Field, PositiveInt
 from typing_extensions import Annotated
 
@@ -98,17 +98,61 @@ class RangeSpecifiedFieldSelector(Selector):
                         ), "'{}' not in {}".format(key, field_value.keys())
                         field_value = field_value[key]
                     field_value_list.append(field_value)
-            field_value_list = [stats_to_number(s) for s in field_value_list]
-            return field_value_list
+            # fast path for plain numeric values. Otherwise, e.g. there are
+            # None or list values, which become NaN or extra dims here, the
+            # values are converted one by one
+            try:
+                field_values = np.asarray(field_value_list, dtype=np.float64)
+                if field_values.ndim == 1 and \
+                        not np.isnan(field_values).any():
+                    return field_values
+            except (TypeError, ValueError):
+                pass
+            return np.fromiter((stats_to_number(s) for s in field_value_list),
+                               dtype=np.float64,
+                               count=len(field_value_list))
 
-        field_value_list = get_field_value_list(dataset, field_keys)
-        select_index = heapq.nsmallest(int(upper_bound), range(len(dataset)),
-                                       field_value_list.__getitem__)
-        sub_dataset = dataset.select(select_index)
+        field_values = get_field_value_list(dataset, field_keys)
+        select_index = self._select_rank_range(field_values, int(lower_bound),
+                                               int(upper_bound))
 
-        field_value_list = get_field_value_list(sub_dataset, field_keys)
-        select_index = heapq.nlargest(int(upper_bound - lower_bound),
-                                      range(len(sub_dataset)),
-                                      field_value_list.__getitem__)
+        return dataset.select(select_index.tolist())
 
-        return sub_dataset.select(select_index)
+    @staticmethod
+    def _select_rank_range(values, lower_bound, upper_bound):
+        """
+        Select the (upper_bound - lower_bound) largest values among the
+        upper_bound smallest ones, with ties taken in index order, and
+        return their indices from the largest value to the smallest one.
+        Values are partitioned around the two bounds instead of being fully
+        sorted.
+
+        :param values: a 1-D array of field values.
+        :param lower_bound: the lower rank bound (inclusive).
+        :param upper_bound: the upper rank bound (exclusive).
+        :return: an array of the selected indices.
+        """
+        num_selected = upper_bound - lower_bound
+        upper_bound = min(upper_bound, len(values))
+        lower_bound = max(upper_bound - num_selected, 0)
+        if upper_bound <= lower_bound:
+            return np.empty(0, dtype=np.int64)
+
+        low_value, high_value = np.partition(
+            values,
+            [lower_bound, upper_bound - 1])[[lower_bound, upper_bound - 1]]
+
+        # values equal to the bounds are taken in index order
+        high_index = np.flatnonzero(values == high_value)
+        high_index = high_index[:upper_bound -
+                                np.count_nonzero(values < high_value)]
+        if low_value == high_value:
+            select_index = high_index[:num_selected]
+        else:
+            mid_index = np.flatnonzero((values > low_value)
+                                       & (values < high_value))
+            low_index = np.flatnonzero(values == low_value)
+            low_index = low_index[:num_selected - len(high_index) -
+                                  len(mid_index)]
+            select_index = np.concatenate([high_index, mid_index, low_index])
+        return select_index[np.argsort(-values[select_index], kind='stable')]
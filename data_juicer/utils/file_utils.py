@@ -4,6 +4,7 @@ import hashlib
 import os
 import re
 import shutil
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import AsyncGenerator, List, Union
@@ -12,6 +13,12 @@ from datasets.utils.extract import ZstdExtractor as Extractor
 
 from data_juicer.utils.constant import DEFAULT_PREFIX, Fields
 
+try:
+    # inotify-based file watching, only available on linux
+    from asyncinotify import Inotify, Mask
+except (ImportError, OSError):
+    Inotify, Mask = None, None
+
 
 async def follow_read(
     logfile_path: str,
@@ -35,13 +42,36 @@ async def follow_read(
             # move to the file's end, similar to `tail -f`
             logfile.seek(0, 2)
 
-        while True:
-            line = logfile.readline()
-            if not line:
-                # no new line, wait to avoid CPU override
-                await asyncio.sleep(0.1)
-                continue
-            yield line
+        inotify = None
+        if Inotify is not None and sys.platform.startswith('linux'):
+            try:
+                inotify = Inotify()
+                # watch before reading, so that no modification is missed
+                inotify.add_watch(logfile_path, Mask.MODIFY)
+            except OSError:
+                # e.g. the limit of inotify instances is reached, fall back to
+                # polling
+                if inotify is not None:
+                    inotify.close()
+                inotify = None
+
+        if inotify is None:
+            while True:
+                line = logfile.readline()
+                if not line:
+                    # no new line, wait to avoid CPU override
+                    await asyncio.sleep(0.1)
+                    continue
+                yield line
+        else:
+            with inotify:
+                while True:
+                    line = logfile.readline()
+                    if not line:
+                        # no new line, sleep until the file is modified
+                        await inotify.get()
+                        continue
+                    yield line
 
 
 def find_files_with_suffix(
@@ -1,5 +1,6 @@
 import base64
 import datetime
+import functools
 import os
 import re
 import shutil
@@ -53,38 +54,61 @@ def get_special_tokens():
     return special_token_dict
 
 
+@functools.lru_cache(maxsize=None)
+def _compile_special_tokens_pattern(special_tokens):
+    return re.compile('|'.join(re.escape(token) for token in special_tokens))
+
+
+def get_special_tokens_pattern():
+    """
+    Get the compiled regex pattern that matches any special token. It's
+    cached for the current values of special tokens, which might be updated
+    by the config.
+    """
+    return _compile_special_tokens_pattern(tuple(
+        get_special_tokens().values()))
+
+
 def remove_special_tokens(text):
-    for value in get_special_tokens().values():
-        text = text.replace(value, '').strip()
-    return text
+    return get_special_tokens_pattern().sub('', text).strip()
 
 
 def remove_non_special_tokens(text):
-    special_tokens = get_special_tokens().values()
-    patterns = '|'.join(re.escape(token) for token in special_tokens)
-    special_tokens_found = re.findall(patterns, text)
+    special_tokens_found = get_special_tokens_pattern().findall(text)
     text_with_only_special_tokens = ''.join(special_tokens_found)
 
     return text_with_only_special_tokens
 
 
-def load_data_with_context(sample, context, loaded_data_keys, load_func):
+def load_data_with_context(sample,
+                           context,
+                           loaded_data_keys,
+                           load_func,
+                           executor=None):
     """
     The unified loading function with contexts for multimodal data.
+
+    :param executor: an optional `concurrent.futures.Executor` to load the
+        data items that are not in the context concurrently.
     """
     data = {}
-    for loaded_data_key in loaded_data_keys:
+    keys_to_load = []
+    # avoid load the same data
+    for loaded_data_key in dict.fromkeys(loaded_data_keys):
         if context and loaded_data_key in sample[Fields.context]:
             # load from context
             data[loaded_data_key] = sample[Fields.context][loaded_data_key]
         else:
-            if loaded_data_key not in data:
-                # avoid load the same data
-                data_item = load_func(loaded_data_key)
-                data[loaded_data_key] = data_item
-                if context:
-                    # store the data into context
-                    sample[Fields.context][loaded_data_key] = data_item
+            keys_to_load.append(loaded_data_key)
+    if executor is not None and len(keys_to_load) > 1:
+        data_items = executor.map(load_func, keys_to_load)
+    else:
+        data_items = map(load_func, keys_to_load)
+    for loaded_data_key, data_item in zip(keys_to_load, data_items):
+        data[loaded_data_key] = data_item
+        if context:
+            # store the data into context
+            sample[Fields.context][loaded_data_key] = data_item
     return sample, data
 
 
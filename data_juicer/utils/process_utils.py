@@ -1,6 +1,7 @@
 import math
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 import multiprocess as mp
 import psutil
@@ -8,6 +9,9 @@ from loguru import logger
 
 from data_juicer import cuda_device_count
 
+# thread pools shared in the current process, with the pid they are created in
+_THREAD_POOLS = {}
+
 
 def setup_mp(method=None):
     if mp.current_process().name != 'MainProcess':
@@ -34,6 +38,25 @@ def setup_mp(method=None):
             break
 
 
+def get_thread_pool(name, max_workers):
+    """
+    Get the thread pool with the given name shared in the current process.
+
+    Threads are not inherited by forked processes, so each process creates
+    its own pools. The pools are created lazily and are not stored in the
+    callers, which keeps the callers picklable.
+
+    :param name: name of the pool.
+    :param max_workers: max number of threads of the pool when it's created.
+    :return: a ThreadPoolExecutor.
+    """
+    pid, pool = _THREAD_POOLS.get(name, (None, None))
+    if pool is None or pid != os.getpid():
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        _THREAD_POOLS[name] = (os.getpid(), pool)
+    return pool
+
+
 def get_min_cuda_memory():
     # get cuda memory info using "nvidia-smi" command
     import torch
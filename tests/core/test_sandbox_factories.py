@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+
+from jsonargparse import Namespace
+
+from data_juicer.core.sandbox.factories import ModelInferEvaluatorFactory
+from data_juicer.utils.unittest_utils import DataJuicerTestCaseBase
+
+
+class ModelInferEvaluatorFactoryTest(DataJuicerTestCaseBase):
+
+    def setUp(self):
+        # avoid loading real ModelScope pipelines
+        patcher = mock.patch(
+            'data_juicer.core.sandbox.factories.ModelscopeInferProbeExecutor',
+            side_effect=lambda model_cfg: mock.Mock(model_cfg=model_cfg))
+        self.executor_cls = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _model_cfg(self, model):
+        return Namespace(type='modelscope',
+                         model=model,
+                         task='text-generation')
+
+    def test_identical_configs(self):
+        factory = ModelInferEvaluatorFactory()
+        executor = factory(self._model_cfg('model_a'))
+        # a different instance of the same config
+        self.assertIs(factory(self._model_cfg('model_a')), executor)
+        self.assertEqual(self.executor_cls.call_count, 1)
+
+    def test_different_configs(self):
+        factory = ModelInferEvaluatorFactory()
+        executor_a = factory(self._model_cfg('model_a'))
+        executor_b = factory(self._model_cfg('model_b'))
+        self.assertIsNot(executor_a, executor_b)
+        self.assertEqual(executor_a.model_cfg.model, 'model_a')
+        self.assertEqual(executor_b.model_cfg.model, 'model_b')
+        self.assertEqual(self.executor_cls.call_count, 2)
+        # only the latest executor is kept by default
+        self.assertEqual(len(factory._executor_cache), 1)
+        self.assertIs(factory(self._model_cfg('model_b')), executor_b)
+        new_executor_a = factory(self._model_cfg('model_a'))
+        self.assertIsNot(new_executor_a, executor_a)
+        self.assertEqual(self.executor_cls.call_count, 3)
+
+    def test_lru_eviction(self):
+        factory = ModelInferEvaluatorFactory(cache_size=2)
+        executor_a = factory(self._model_cfg('model_a'))
+        executor_b = factory(self._model_cfg('model_b'))
+        # model_a becomes the most recently used one
+        self.assertIs(factory(self._model_cfg('model_a')), executor_a)
+        factory(self._model_cfg('model_c'))
+        self.assertEqual(len(factory._executor_cache), 2)
+        self.assertEqual(self.executor_cls.call_count, 3)
+        # model_b is evicted while model_a is kept
+        self.assertIs(factory(self._model_cfg('model_a')), executor_a)
+        self.assertIsNot(factory(self._model_cfg('model_b')), executor_b)
+        self.assertEqual(self.executor_cls.call_count, 4)
+
+    def test_cache_disabled(self):
+        factory = ModelInferEvaluatorFactory(cache_size=0)
+        executor = factory(self._model_cfg('model_a'))
+        self.assertIsNot(factory(self._model_cfg('model_a')), executor)
+        self.assertEqual(self.executor_cls.call_count, 2)
+        self.assertEqual(len(factory._executor_cache), 0)
+
+    def test_unknown_type(self):
+        factory = ModelInferEvaluatorFactory()
+        self.assertIsNone(factory())
+        self.assertIsNone(factory(Namespace(type='unknown')))
+        self.executor_cls.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,14 +2,23 @@
 
 import os
 import unittest
+from types import SimpleNamespace
+from unittest import mock
 
-from data_juicer.core.data import NestedDataset as Dataset
+import numpy as np
+import torch
+from transformers import BatchFeature
 
+from data_juicer.core.data import NestedDataset as Dataset
 from data_juicer.ops.filter.image_text_matching_filter import \
     ImageTextMatchingFilter
-from data_juicer.utils.constant import Fields
-from data_juicer.utils.mm_utils import SpecialTokens
-from data_juicer.utils.unittest_utils import DataJuicerTestCaseBase, SKIPPED_TESTS
+from data_juicer.utils.constant import Fields, StatsKeys
+from data_juicer.utils.mm_utils import SpecialTokens, load_image
+from data_juicer.utils.unittest_utils import (SKIPPED_TESTS,
+                                              DataJuicerTestCaseBase)
+
+OP_MODULE = 'data_juicer.ops.filter.image_text_matching_filter'
+
 
 @SKIPPED_TESTS.register_module()
 class ImageTextMatchingFilterTest(DataJuicerTestCaseBase):
@@ -207,6 +216,28 @@ class ImageTextMatchingFilterTest(DataJuicerTestCaseBase):
                                      max_score=1.0)
         self._run_filter(dataset, tgt_list, op)
 
+    def test_fewer_images_than_tokens(self):
+
+        ds_list = [{
+            'text':
+            f'{SpecialTokens.image}a woman sitting on the beach with a dog '
+            f'{SpecialTokens.image} {SpecialTokens.eoc}',
+            'images': [self.demo_path]
+        }]
+        tgt_list = [{
+            'text':
+            f'{SpecialTokens.image}a woman sitting on the beach with a dog '
+            f'{SpecialTokens.image} {SpecialTokens.eoc}',
+            'images': [self.demo_path]
+        }]
+        dataset = Dataset.from_list(ds_list)
+        op = ImageTextMatchingFilter(hf_blip=self.hf_blip,
+                                     reduce_mode='avg',
+                                     any_or_all='any',
+                                     min_score=0.003,
+                                     max_score=1.0)
+        self._run_filter(dataset, tgt_list, op)
+
     def test_reduce_max(self):
 
         ds_list = [{
@@ -246,6 +277,14 @@ class ImageTextMatchingFilterTest(DataJuicerTestCaseBase):
                                      max_score=0.9)
         self._run_filter(dataset, [], op)
 
+    def _compute_scores(self, samples, op):
+        scores = []
+        for sample in samples:
+            sample = op.compute_stats({**sample, Fields.stats: {}})
+            scores.append(
+                sample[Fields.stats][StatsKeys.image_text_matching_score])
+        return scores
+
     def test_multi_process(self):
 
         ds_list = [{
@@ -268,6 +307,238 @@ class ImageTextMatchingFilterTest(DataJuicerTestCaseBase):
                                      max_score=1.0)
         self._run_filter(dataset, tgt_list, op, num_proc=4)
 
+    def test_cache(self):
+
+        ds_list = [{
+            'text':
+            f'{SpecialTokens.image}a woman sitting on the beach with a dog',
+            'images': [self.demo_path]
+        }, {
+            'text':
+            f'{SpecialTokens.image}a man sitting on the grass with a cat',
+            'images': [self.demo_path]
+        }] * 3
+        tgt_list = [{
+            'text':
+            f'{SpecialTokens.image}a woman sitting on the beach with a dog',
+            'images': [self.demo_path]
+        }] * 3
+        for cache_size in [0, 1, 1024]:
+            dataset = Dataset.from_list(ds_list)
+            op = ImageTextMatchingFilter(hf_blip=self.hf_blip,
+                                         reduce_mode='avg',
+                                         any_or_all='any',
+                                         min_score=0.003,
+                                         max_score=1.0,
+                                         cache_size=cache_size)
+            self._run_filter(dataset, tgt_list, op)
+            self.assertLessEqual(len(op.score_cache), cache_size)
+
+        # the cached scores are the same as the computed ones, and the images
+        # of repeated samples are not loaded again
+        op = ImageTextMatchingFilter(hf_blip=self.hf_blip, cache_size=0)
+        tgt_scores = self._compute_scores(ds_list, op)
+        # samples alternate, so each of them is evicted before it repeats
+        # when only one is kept
+        for cache_size, num_loads in [(1, 6), (1024, 2)]:
+            op = ImageTextMatchingFilter(hf_blip=self.hf_blip,
+                                         cache_size=cache_size)
+            with mock.patch(f'{OP_MODULE}.load_image',
+                            wraps=load_image) as load_image_mock:
+                scores = self._compute_scores(ds_list, op)
+            np.testing.assert_allclose(scores, tgt_scores)
+            self.assertEqual(load_image_mock.call_count, num_loads)
+
+
+class StubBlipProcessor:
+    """Stand-in for the BLIP processor, which records the image-text pairs it
+    gets and encodes each pair as the logits of its expected score."""
+
+    def __init__(self):
+        self.calls = []
+
+    @staticmethod
+    def score(text, image):
+        return 0.1 + 0.8 * ((len(text) + image.width) % 100) / 100
+
+    def __call__(self, text, images, **kwargs):
+        self.calls.append((list(text), [image.size for image in images]))
+        scores = torch.tensor(
+            [self.score(t, image) for t, image in zip(text, images)])
+        # the softmax of these logits is (1 - score, score)
+        logits = torch.stack([torch.zeros_like(scores),
+                              torch.logit(scores)],
+                             dim=-1)
+        return BatchFeature({'itm_logits': logits})
+
+
+class StubBlipModel:
+    """Stand-in for the BLIP ITM model, which returns the logits encoded by
+    StubBlipProcessor."""
+
+    device = torch.device('cpu')
+    config = SimpleNamespace(text_config=SimpleNamespace(
+        max_position_embeddings=512))
+
+    def __init__(self):
+        self.num_forwards = 0
+
+    def __call__(self, itm_logits):
+        self.num_forwards += 1
+        return SimpleNamespace(itm_score=itm_logits)
+
+
+class ImageTextMatchingFilterStubModelTest(DataJuicerTestCaseBase):
+    """Tests ImageTextMatchingFilter.compute_stats without loading the BLIP
+    model."""
+
+    data_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..',
+                             'data')
+
+    demo_path = os.path.join(data_path, 'blip.jpg')
+    img3_path = os.path.join(data_path, 'img3.jpg')
+
+    def setUp(self):
+        self.model = StubBlipModel()
+        self.processor = StubBlipProcessor()
+        patches = {
+            'prepare_model': 'stub_model_key',
+            'get_model': (self.model, self.processor),
+        }
+        for name, return_value in patches.items():
+            patcher = mock.patch(f'{OP_MODULE}.{name}',
+                                 return_value=return_value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.demo_size = load_image(self.demo_path).size
+        self.img3_size = load_image(self.img3_path).size
+
+    def _compute_scores(self, samples, **op_kwargs):
+        op = ImageTextMatchingFilter(**op_kwargs)
+        scores = []
+        for sample in samples:
+            sample = op.compute_stats({**sample, Fields.stats: {}})
+            scores.append(
+                sample[Fields.stats][StatsKeys.image_text_matching_score])
+        return op, scores
+
+    def _score(self, text, image_path):
+        return StubBlipProcessor.score(text, load_image(image_path))
+
+    def test_pairs_and_reduce(self):
+        text_1 = 'a woman sitting on the beach with a dog'
+        text_3 = 'a man sitting on the grass with a cat'
+        samples = [{
+            'text':
+            f'{SpecialTokens.image}{text_1} {SpecialTokens.image}'
+            f'{SpecialTokens.eoc} text without images {SpecialTokens.eoc}'
+            f'{SpecialTokens.image} {text_3}',
+            'images': [self.demo_path, self.img3_path, self.img3_path]
+        }]
+        pair_scores = [
+            self._score(text_1, self.demo_path),
+            self._score(text_1, self.img3_path),
+            self._score(text_3, self.img3_path)
+        ]
+        for reduce_mode, reduce_func in [('avg', np.mean), ('max', np.max),
+                                         ('min', np.min)]:
+            self.processor.calls.clear()
+            _, scores = self._compute_scores(samples,
+                                             reduce_mode=reduce_mode,
+                                             cache_size=0)
+            # all the pairs of the sample are scored in one forward
+            tgt_texts = [text_1, text_1, text_3]
+            tgt_sizes = [self.demo_size, self.img3_size, self.img3_size]
+            self.assertEqual(self.processor.calls, [(tgt_texts, tgt_sizes)])
+            # the scores are split into chunks of 2 and 1 pairs
+            tgt_scores = [
+                reduce_func(pair_scores[:2]),
+                reduce_func(pair_scores[2:])
+            ]
+            np.testing.assert_allclose(scores, [tgt_scores], rtol=1e-5)
+
+    def test_fewer_images_than_tokens(self):
+        text = 'a woman sitting on the beach with a dog'
+        samples = [{
+            'text':
+            f'{SpecialTokens.image}{text} {SpecialTokens.eoc}'
+            f'{SpecialTokens.image}{SpecialTokens.image} {text}'
+            f'{SpecialTokens.eoc}{SpecialTokens.image} {text}',
+            'images': [self.demo_path, self.img3_path]
+        }]
+        _, scores = self._compute_scores(samples, cache_size=0)
+        # the second chunk has only one of its two images, and the last one
+        # has none left
+        tgt_sizes = [self.demo_size, self.img3_size]
+        self.assertEqual(self.processor.calls, [([text, text], tgt_sizes)])
+        tgt_scores = [
+            self._score(text, self.demo_path),
+            self._score(text, self.img3_path)
+        ]
+        np.testing.assert_allclose(scores, [tgt_scores], rtol=1e-5)
+
+    def test_no_images(self):
+        samples = [{
+            'text': 'text without images',
+            'images': []
+        }, {
+            'text': f'{SpecialTokens.eoc}text without image tokens',
+            'images': [self.demo_path]
+        }]
+        _, scores = self._compute_scores(samples)
+        self.assertEqual([list(sample_scores) for sample_scores in scores],
+                         [[], []])
+        self.assertEqual(self.model.num_forwards, 0)
+
+    def test_cache(self):
+        sample_1 = {
+            'text': f'{SpecialTokens.image}a woman sitting on the beach',
+            'images': [self.demo_path]
+        }
+        sample_2 = {
+            'text': f'{SpecialTokens.image}a man sitting on the grass',
+            'images': [self.img3_path]
+        }
+        sample_3 = {
+            'text': f'{SpecialTokens.image}a dog sitting on the beach',
+            'images': [self.demo_path]
+        }
+        samples = [sample_1, sample_1, sample_2, sample_1, sample_3, sample_1]
+        _, tgt_scores = self._compute_scores(samples, cache_size=0)
+        self.assertEqual(self.model.num_forwards, 6)
+
+        # (cache_size, number of misses, cached samples in LRU order). With 2
+        # cached samples, sample_3 evicts sample_2 rather than sample_1,
+        # which is used more recently
+        for cache_size, num_misses, cached_samples in [
+            (1, 5, [sample_1]),
+            (2, 3, [sample_3, sample_1]),
+        ]:
+            self.model.num_forwards = 0
+            with mock.patch(f'{OP_MODULE}.load_image',
+                            wraps=load_image) as load_image_mock:
+                op, scores = self._compute_scores(samples,
+                                                  cache_size=cache_size)
+            self.assertEqual(scores, tgt_scores)
+            # cache hits reach neither the model nor the image loading
+            self.assertEqual(self.model.num_forwards, num_misses)
+            self.assertEqual(load_image_mock.call_count, num_misses)
+            self.assertEqual(list(op.score_cache), [
+                op._get_cache_key(sample['images'], sample['text'])
+                for sample in cached_samples
+            ])
+
+    def test_cached_scores_are_copies(self):
+        sample = {
+            'text': f'{SpecialTokens.image}a woman sitting on the beach',
+            'images': [self.demo_path]
+        }
+        op, scores = self._compute_scores([sample, sample])
+        self.assertEqual(self.model.num_forwards, 1)
+        scores[0].append(1.0)
+        self.assertEqual(len(scores[1]), 1)
+        self.assertEqual(len(next(iter(op.score_cache.values()))), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 
+from data_juicer.core import NestedDataset as Dataset
 from data_juicer.ops.mapper.fix_unicode_mapper import FixUnicodeMapper
 from data_juicer.utils.unittest_utils import DataJuicerTestCaseBase
 
@@ -10,9 +11,10 @@ class FixUnicodeMapperTest(DataJuicerTestCaseBase):
         self.op = FixUnicodeMapper()
 
     def _run_fix_unicode(self, samples):
-        for sample in samples:
-            result = self.op.process(sample)
-            self.assertEqual(result['text'], result['target'])
+        dataset = Dataset.from_list(samples)
+        dataset = dataset.map(self.op.process, batch_size=2)
+        for data in dataset:
+            self.assertEqual(data['text'], data['target'])
 
     def test_bad_unicode_text(self):
 
@@ -36,6 +38,10 @@ class FixUnicodeMapperTest(DataJuicerTestCaseBase):
                 'text': 'No problems',
                 'target': 'No problems'
             },
+            {
+                'text': 'Tom &amp; Jerry\r\n',
+                'target': 'Tom & Jerry\n'
+            },
             {
                 'text': '阿里巴巴',
                 'target': '阿里巴巴'
@@ -2,12 +2,15 @@
 
 import os
 import unittest
+from unittest import mock
 
 from data_juicer.core.data import NestedDataset as Dataset
 from data_juicer.ops.mapper.video_split_by_duration_mapper import \
     VideoSplitByDurationMapper
 from data_juicer.utils.file_utils import add_suffix_to_filename
-from data_juicer.utils.mm_utils import SpecialTokens
+from data_juicer.utils.mm_utils import (SpecialTokens, close_video,
+                                        cut_video_by_seconds,
+                                        get_video_duration, load_video)
 from data_juicer.utils.unittest_utils import DataJuicerTestCaseBase
 
 
@@ -61,9 +64,12 @@ class VideoSplitByDurationMapperTest(DataJuicerTestCaseBase):
                                             op,
                                             source_list,
                                             target_list,
-                                            num_proc=1):
+                                            num_proc=1,
+                                            batch_size=1):
         dataset = Dataset.from_list(source_list)
-        dataset = dataset.map(op.process, num_proc=num_proc)
+        dataset = dataset.map(op.process,
+                              num_proc=num_proc,
+                              batch_size=batch_size)
         res_list = self._get_res_list(dataset, source_list)
         self.assertEqual(res_list, target_list)
 
@@ -230,6 +236,61 @@ class VideoSplitByDurationMapperTest(DataJuicerTestCaseBase):
                                         keep_original_sample=False)
         self._run_video_split_by_duration_mapper(op, ds_list, tgt_list)
 
+    def test_duplicate_videos(self):
+        ds_list = [{
+            'text': f'{SpecialTokens.video} 白色的小羊站在一旁讲话。旁边还有两只灰色猫咪和一只拉着灰狼的猫咪。',
+            'videos': [self.vid1_path]
+        }, {
+            'text':
+            f'{SpecialTokens.video} 白色的小羊站在一旁讲话。{SpecialTokens.eoc}{SpecialTokens.video} 旁边还有两只灰色猫咪和一只拉着灰狼的猫咪。{SpecialTokens.eoc}',
+            'videos': [self.vid1_path, self.vid1_path]
+        }]
+        tgt_list = [{
+            'text':
+            f'{SpecialTokens.video}{SpecialTokens.video} 白色的小羊站在一旁讲话。旁边还有两只灰色猫咪和一只拉着灰狼的猫咪。{SpecialTokens.eoc}',
+            'split_frames_num': [2]
+        }, {
+            'text':
+            f'{SpecialTokens.video}{SpecialTokens.video} 白色的小羊站在一旁讲话。{SpecialTokens.eoc}{SpecialTokens.video}{SpecialTokens.video} 旁边还有两只灰色猫咪和一只拉着灰狼的猫咪。{SpecialTokens.eoc}',
+            'split_frames_num': [4, 4]
+        }]
+        op = VideoSplitByDurationMapper(split_duration=10,
+                                        keep_original_sample=False)
+        self._run_video_split_by_duration_mapper(op,
+                                                 ds_list,
+                                                 tgt_list,
+                                                 batch_size=2)
+
+    def test_failed_cut(self):
+        op = VideoSplitByDurationMapper(split_duration=10,
+                                        keep_original_sample=False)
+
+        def cut_with_failures(input_video, output_video, *args):
+            # fail to cut the 2nd and the 4th segments
+            if output_video.endswith(('_1.mp4', '_3.mp4')):
+                return False
+            return cut_video_by_seconds(input_video, output_video, *args)
+
+        container = load_video(self.vid3_path)
+        with mock.patch(
+                'data_juicer.ops.mapper.video_split_by_duration_mapper.'
+                'cut_video_by_seconds', cut_with_failures):
+            split_video_keys = op.split_videos_by_duration(
+                self.vid3_path, container)
+        close_video(container)
+
+        # the 3 successful splits are numbered continuously
+        self.assertEqual([key.rsplit('_', 1)[-1] for key in split_video_keys],
+                         ['0.mp4', '1.mp4', '2.mp4'])
+        # and in the order of their segments, the last of which is shorter
+        durations = []
+        for split_video_key in split_video_keys:
+            split_video = load_video(split_video_key)
+            durations.append(get_video_duration(split_video))
+            close_video(split_video)
+        self.assertGreater(durations[1], 9.5)
+        self.assertLess(durations[2], 9.9)
+
 
 if __name__ == '__main__':
     unittest.main()
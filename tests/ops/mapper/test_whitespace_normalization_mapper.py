@@ -24,6 +24,24 @@ class WhitespaceNormalizationMapperTest(DataJuicerTestCaseBase):
 
         self._run_whitespace_normalization(samples)
 
+    def test_ascii_case(self):
+
+        samples = [{
+            'text': ' \t x\ty \t\tz\t ',
+            'target': 'x y   z'
+        }, {
+            'text': 'line 1\nline\t2\r\nline 3\r',
+            'target': 'line 1\nline 2\r\nline 3'
+        }, {
+            'text': '\n\t\r\n',
+            'target': ''
+        }, {
+            'text': 'no whitespace to normalize',
+            'target': 'no whitespace to normalize'
+        }]
+
+        self._run_whitespace_normalization(samples)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from data_juicer.utils import file_utils
+from data_juicer.utils.file_utils import follow_read
+from data_juicer.utils.unittest_utils import DataJuicerTestCaseBase
+
+END_MARKER = '<END>'
+
+# append lines to the file slowly, so that the reader has to wait for them
+WRITER_SCRIPT = f'''
+import sys
+import time
+
+with open(sys.argv[1], 'a') as f:
+    for i in range(int(sys.argv[2])):
+        print(f'line {{i}}', file=f, flush=True)
+        time.sleep(0.01)
+    print('{END_MARKER}', file=f, flush=True)
+'''
+
+
+class FollowReadTest(DataJuicerTestCaseBase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp_dir.name, 'test.log')
+        with open(self.log_path, 'w') as f:
+            print('existing line', file=f)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def _follow_subprocess_writes(self, num_lines):
+        proc = await asyncio.create_subprocess_exec(sys.executable, '-c',
+                                                    WRITER_SCRIPT,
+                                                    self.log_path,
+                                                    str(num_lines))
+        lines = []
+        try:
+            async for line in follow_read(self.log_path):
+                line = line.rstrip('\n')
+                if line == END_MARKER:
+                    break
+                lines.append(line)
+        finally:
+            await proc.wait()
+        return lines
+
+    def _run_follow_read(self, num_lines):
+        # fail instead of hanging if any line or the end marker is missed
+        coro = self._follow_subprocess_writes(num_lines)
+        return asyncio.run(asyncio.wait_for(coro, timeout=60))
+
+    @unittest.skipIf(file_utils.Inotify is None
+                     or not sys.platform.startswith('linux'),
+                     'inotify is not available')
+    def test_follow_read_inotify(self):
+        lines = self._run_follow_read(num_lines=50)
+        self.assertEqual(lines,
+                         ['existing line'] + [f'line {i}' for i in range(50)])
+
+    def test_follow_read_polling(self):
+        with mock.patch.object(file_utils, 'Inotify', None):
+            lines = self._run_follow_read(num_lines=10)
+        self.assertEqual(lines,
+                         ['existing line'] + [f'line {i}' for i in range(10)])
+
+    @contextlib.contextmanager
+    def _patch_inotify(self, inotify_cls):
+        # pretend to be on linux with the given inotify implementation
+        with mock.patch.object(file_utils, 'Inotify', inotify_cls), \
+                mock.patch.object(file_utils, 'Mask', mock.Mock()), \
+                mock.patch.object(file_utils, 'sys',
+                                  mock.Mock(platform='linux')):
+            yield
+
+    def test_follow_read_inotify_init_error(self):
+        # e.g. fs.inotify.max_user_instances is exhausted
+        inotify_cls = mock.Mock(side_effect=OSError(24, 'Too many open files'))
+        with self._patch_inotify(inotify_cls):
+            lines = self._run_follow_read(num_lines=10)
+        inotify_cls.assert_called_once()
+        self.assertEqual(lines,
+                         ['existing line'] + [f'line {i}' for i in range(10)])
+
+    def test_follow_read_inotify_watch_error(self):
+        # e.g. fs.inotify.max_user_watches is exhausted
+        inotify = mock.Mock()
+        inotify.add_watch.side_effect = OSError(28, 'No space left on device')
+        with self._patch_inotify(mock.Mock(return_value=inotify)):
+            lines = self._run_follow_read(num_lines=10)
+        inotify.close.assert_called_once()
+        self.assertEqual(lines,
+                         ['existing line'] + [f'line {i}' for i in range(10)])
+
+
+if __name__ == '__main__':
+    unittest.main()
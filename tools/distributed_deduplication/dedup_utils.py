@@ -2,6 +2,11 @@
 # https://github.com/bigcode-project/bigcode-dataset/blob/main/near_deduplication/minhash_deduplication_spark.py
 # --------------------------------------------------------
 
+import atexit
+import os
+import shutil
+import tempfile
+from operator import add
 from typing import List, Optional, Tuple
 
 from loguru import logger
@@ -12,7 +17,9 @@ from pyspark.sql import SparkSession
 def init_spark(master_url: Optional[str] = None,
                spark_executor_memory=None,
                spark_driver_memory=None,
-               spark_executor_memoryOverhead=None):
+               spark_executor_memoryOverhead=None,
+               num_partitions: Optional[int] = None,
+               checkpoint_dir: Optional[str] = None):
     if not spark_executor_memory:
         spark_executor_memory = '64g'
     if not spark_driver_memory:
@@ -21,6 +28,14 @@ def init_spark(master_url: Optional[str] = None,
         spark_executor_memoryOverhead = '20000'
     if not master_url:
         master_url = 'local[*]'
+    if not num_partitions and master_url.startswith('local'):
+        num_partitions = (os.cpu_count() or 1) * 3
+    if not checkpoint_dir and master_url.startswith('local'):
+        # Spark only removes the checkpoint files of released RDDs, so the
+        # temporary directory created here is removed when the process exits.
+        # A given checkpoint_dir is owned and cleaned up by the caller
+        checkpoint_dir = tempfile.mkdtemp(prefix='dj_spark_checkpoint_')
+        atexit.register(shutil.rmtree, checkpoint_dir, ignore_errors=True)
     conf = SparkConf()
     conf.set('spark.app.name', 'MinHashLSH')
     conf.set('spark.debug.maxToStringFields', '100')
@@ -29,7 +44,19 @@ def init_spark(master_url: Optional[str] = None,
     conf.set('spark.driver.memory', spark_driver_memory)
     conf.set('spark.sql.execution.arrow.pyspark.enabled', 'true')
     conf.set('spark.executor.memoryOverhead', spark_executor_memoryOverhead)
+    # the iterative shuffles in find_components benefit from smaller
+    # serialized and compressed payloads
+    conf.set('spark.serializer', 'org.apache.spark.serializer.KryoSerializer')
+    conf.set('spark.kryoserializer.buffer.max', '1g')
+    conf.set('spark.rdd.compress', 'true')
+    if num_partitions:
+        conf.set('spark.default.parallelism', str(num_partitions))
+        conf.set('spark.sql.shuffle.partitions', str(num_partitions))
+    # remove the checkpoint files once the checkpointed RDDs are released
+    conf.set('spark.cleaner.referenceTracking.cleanCheckpoints', 'true')
     spark = SparkSession.builder.config(conf=conf).getOrCreate()
+    if checkpoint_dir:
+        spark.sparkContext.setCheckpointDir(checkpoint_dir)
     logger.info('Spark initialization done.')
     return spark
 
@@ -64,9 +91,16 @@ def large_star_map(edge):
 
 def large_star_reduce(group):
     x, neighbors = group
-    nodes = [x] + list(neighbors)
-    minimum = min(nodes)
-    return [(n, minimum) for n in nodes if n > x]
+    # find the minimum and the larger neighbors in a single pass. Neighbors
+    # smaller than the minimum so far are smaller than x as well
+    minimum = x
+    larger_nodes = []
+    for n in neighbors:
+        if n < minimum:
+            minimum = n
+        elif n > x:
+            larger_nodes.append(n)
+    return [(n, minimum) for n in larger_nodes]
 
 
 def small_star_map(edge):
@@ -79,25 +113,56 @@ def small_star_map(edge):
 
 def small_star_reduce(group):
     x, neighbors = group
-    nodes = [x] + list(neighbors)
-    minimum = min(nodes)
+    # collect the nodes and find the minimum in a single pass
+    minimum = x
+    nodes = [x]
+    for n in neighbors:
+        nodes.append(n)
+        if n < minimum:
+            minimum = n
     return [(n, minimum) for n in nodes if n != minimum]
 
 
-def find_components(edges):
+def find_components(edges, checkpoint_interval: int = 3):
     """
     Star-Graph-Connected-Components (SGCC) algorithm
+
+    :param edges: RDD of the edges.
+    :param checkpoint_interval: the edges are checkpointed every this number
+        of iterations to truncate their lineage. It only takes effect when
+        the checkpoint directory of the Spark context is set.
+    :return: the list of (node, the minimum node of its component) pairs.
     """
 
+    # checkpoints are written to reliable storage, so the RDDs depending on
+    # them can still be recomputed after their cached blocks are released
+    use_checkpoint = edges.context.getCheckpointDir() is not None
     a = edges
+    num_iterations = 0
     while True:
+        num_iterations += 1
         b = a.flatMap(large_star_map).groupByKey().flatMap(
             large_star_reduce).distinct().cache()
-        a = b.map(small_star_map).groupByKey().flatMap(
+        new_a = b.map(small_star_map).groupByKey().flatMap(
             small_star_reduce).distinct().cache()
-        changes = a.subtract(b).union(b.subtract(a)).collect()
-        if len(changes) == 0:
+        if use_checkpoint and num_iterations % checkpoint_interval == 0:
+            # truncate the lineage, which grows with the iterations
+            new_a.checkpoint()
+        # both sides are distinct, so they are the same if and only if no
+        # edge is counted only once in their union
+        changed = not new_a.map(lambda edge: (edge, 1)).union(
+            b.map(lambda edge: (edge, -1))).reduceByKey(add).filter(
+                lambda kv: kv[1] != 0).isEmpty()
+        # the shuffle above has materialized the new edges, so the cached
+        # RDDs of the former iteration can be released. They are recomputed
+        # from their lineage or checkpoints if the new edges are lost
+        b.unpersist()
+        if a is not edges:
+            a.unpersist()
+        a = new_a
+        if not changed:
             break
 
     results = a.collect()
+    a.unpersist()
     return results
@@ -22,7 +22,9 @@ def dedup_dataset(dataset_path: str,
                   num_features: int = 1047576,
                   num_hashtables: int = 10,
                   text_key: str = 'text',
-                  master_url: Optional[str] = None):
+                  master_url: Optional[str] = None,
+                  num_partitions: Optional[int] = None,
+                  checkpoint_dir: Optional[str] = None):
     """
     Perform fuzzy text deduplication on the given dataset.
     :param dataset_path: the path to the dataset to perform deduplication,
@@ -40,10 +42,21 @@ def dedup_dataset(dataset_path: str,
         "text" in default.
     :param master_url: the master url for spark config. Default is None.
         If None, then run with local[*].
+    :param num_partitions: the default number of partitions for shuffles.
+        Default is None. If None, it's set to 3 times the number of CPU cores
+        when running locally, and Spark defaults are used otherwise.
+    :param checkpoint_dir: the directory to checkpoint the edges while
+        finding connected components. It must be accessible by all the
+        nodes, e.g. on HDFS, for a cluster. The checkpoint files left in it
+        are not removed, so the caller needs to clean it up. Default is None.
+        If None, a temporary directory is used and removed at exit when
+        running locally, and the edges are not checkpointed otherwise.
     """
     # for inited cluster,
     # provide master url such as "spark://master:7077"
-    spark = init_spark(master_url=master_url)
+    spark = init_spark(master_url=master_url,
+                       num_partitions=num_partitions,
+                       checkpoint_dir=checkpoint_dir)
     ds = load_dataset(spark, dataset_path, text_key=text_key)
     ds = ds.withColumn('id', F.monotonically_increasing_id()).cache()
     df = ds
@@ -27,16 +27,79 @@
 # Reference:
 # https://huggingface.co/datasets/OpenGVLab/InternVid
 
+import json
 import os
+from functools import partial
+from multiprocessing import Pool
 
 import fire
-import jsonlines as jl
 from loguru import logger
 from tqdm import tqdm
 
 from data_juicer.utils.mm_utils import SpecialTokens
 from tools.multimodal.utils import remove_dj_special_tokens
 
+# size in bytes of each range of the input dataset converted at once
+RANGE_SIZE = 16 * 1024 * 1024
+
+
+def split_into_line_ranges(path, range_size=RANGE_SIZE):
+    """
+    Split a jsonl file into byte ranges which end at line breaks.
+
+    :param path: path to the jsonl file.
+    :param range_size: the approximate size in bytes of each range.
+    :return: a list of (start, end) byte offsets.
+    """
+    file_size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < file_size:
+            # move to the end of the line containing the expected end
+            f.seek(min(start + range_size, file_size) - 1)
+            f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def convert_line_range(byte_range, dj_ds_path, text_key, video_key,
+                       tgt_text_key, tgt_video_key, eoc_special_token,
+                       video_special_token, sent_separator):
+    """
+    Convert the samples within a byte range of the input dataset, and return
+    the converted samples as jsonl lines.
+    """
+    start, end = byte_range
+    with open(dj_ds_path, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).decode('utf-8').split('\n')
+
+    # encode the same way as the jsonlines writer does
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    results = []
+    for line in lines:
+        if not line.strip():
+            continue
+        s = json.loads(line)
+        # other fields are kept in the sample itself
+        video = s.pop(video_key)[0]
+        text = s.pop(text_key)
+
+        # add video
+        s[tgt_video_key] = video
+
+        # add caption
+        text = remove_dj_special_tokens(text.strip(), eoc_special_token,
+                                        sent_separator, video_special_token)
+
+        s[tgt_text_key] = text
+
+        results.append(encode(s) + '\n')
+    return ''.join(results)
+
 
 def main(
     dj_ds_path: str,
@@ -44,6 +107,7 @@ def main(
     eoc_special_token: str = SpecialTokens.eoc,
     video_special_token: str = SpecialTokens.video,
     sent_separator: str = ' ',
+    num_proc: int = 1,
 ):
     """
     Convert a Data-Juicer-format dataset to a InternVid-like dataset.
@@ -60,6 +124,7 @@ def main(
         special token from our Data-Juicer. Default: <__dj__video> (from
         Data-Juicer).
     :param sent_separator: separator to split different sentences. Default: " "
+    :param num_proc: number of processes to convert the dataset. Default: 1
     """
     # ----- Constant settings. Better not to change them. -----
     text_key = 'text'  # default key of field to store the sample text
@@ -85,29 +150,31 @@ def main(
 
     # save InternVid dataset from Data-Juicer format
     logger.info('Start converting the original dataset to InternVid format...')
-    with jl.open(dj_ds_path) as reader:
-        with jl.open(target_internvid_ds_path, mode='w') as writer:
-            for line_num, s in enumerate(tqdm(reader)):
-                video = s.pop(video_key)[0]
-                text = s.pop(text_key)
-
-                new_sample = {}
-                # add other fields
-                for key in s:
-                    new_sample[key] = s[key]
-
-                # add video
-                new_sample[tgt_video_key] = video
-
-                # add caption
-                text = remove_dj_special_tokens(text.strip(),
-                                                eoc_special_token,
-                                                sent_separator,
-                                                video_special_token)
-
-                new_sample[tgt_text_key] = text
-
-                writer.write(new_sample)
+    # the input dataset is split into ranges of lines, which are converted in
+    # parallel and written in order
+    convert_func = partial(convert_line_range,
+                           dj_ds_path=dj_ds_path,
+                           text_key=text_key,
+                           video_key=video_key,
+                           tgt_text_key=tgt_text_key,
+                           tgt_video_key=tgt_video_key,
+                           eoc_special_token=eoc_special_token,
+                           video_special_token=video_special_token,
+                           sent_separator=sent_separator)
+    line_ranges = split_into_line_ranges(dj_ds_path)
+    with open(target_internvid_ds_path,
+              'w',
+              encoding='utf-8',
+              buffering=1 << 20) as writer:
+        if num_proc > 1:
+            with Pool(num_proc) as pool:
+                for lines in tqdm(pool.imap(convert_func, line_ranges),
+                                  total=len(line_ranges)):
+                    writer.write(lines)
+        else:
+            for lines in tqdm(map(convert_func, line_ranges),
+                              total=len(line_ranges)):
+                writer.write(lines)
     logger.info(f'Store the target dataset into [{target_internvid_ds_path}].')
 
 